@@ -0,0 +1,58 @@
+# Click-storm benchmark for the verification panel button.
+# Drives the same code path as PersistentVerificationView.verify_button with
+# fake interactions and reports click-to-link latency, cached vs. uncached.
+#
+#   python bench_panel.py [clicks] [guilds]
+
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+
+import securityhh
+
+
+class FakeResponse:
+    async def send_message(self, embed=None, ephemeral=False):
+        await asyncio.sleep(0)  # yield like a real network call would
+
+
+def fake_interaction(user_id, guild_id):
+    return SimpleNamespace(
+        user=SimpleNamespace(id=user_id),
+        guild_id=guild_id,
+        response=FakeResponse(),
+    )
+
+
+async def click_storm(clicks, guilds, cached):
+    securityhh.panel_click_latencies.clear()
+    guild_ids = [1000000000000000000 + g for g in range(guilds)]
+
+    async def click(i):
+        if not cached:
+            securityhh.invalidate_panel_templates()
+        guild_id = guild_ids[i % guilds]
+        await securityhh.respond_with_verification_link(fake_interaction(i, guild_id), guild_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(click(i) for i in range(clicks)))
+    elapsed = time.perf_counter() - start
+    return elapsed, securityhh.panel_latency_stats()
+
+
+async def main():
+    clicks = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    guilds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    for cached in (False, True):
+        elapsed, stats = await click_storm(clicks, guilds, cached)
+        label = "cached" if cached else "uncached"
+        print(
+            f"{label:>8}: {clicks} clicks in {elapsed:.3f}s ({clicks / elapsed:,.0f} clicks/s) "
+            f"p50={stats['p50_ms']} ms p95={stats['p95_ms']} ms max={stats['max_ms']} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+# Incremental JSON reading without loading whole documents.
+# Stdlib only and free of import side effects, so both the bot and the
+# offline tools can use it.
+
+import json
+
+_WHITESPACE = " \t\r\n"
+
+
+class JSONStream:
+    """Walk a JSON document from a text file object one member at a time.
+
+    Containers are entered with items(), which yields each object key (or
+    array index) and leaves the stream positioned at that member's value;
+    the caller then consumes the value with value() or by iterating items()
+    again. Only the member currently being decoded is held in memory.
+    """
+
+    def __init__(self, f, chunk_size=65536):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it ("" at end)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ""
+            self._fill()
+
+    def _expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} in JSON stream")
+        self.pos += 1
+
+    def value(self):
+        """Decode and return the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # A number running into the end of the buffer may continue in the next chunk
+            if end == len(self.buf) and not self.eof and not isinstance(obj, (dict, list, str)):
+                self._fill()
+                continue
+            self.pos = end
+            return obj
+
+    def items(self):
+        """Yield the keys (objects) or indexes (arrays) of the container at the cursor"""
+        opening = self.peek()
+        if opening not in "{[" or not opening:
+            raise ValueError("expected a JSON object or array")
+        closing = "}" if opening == "{" else "]"
+        self.pos += 1
+        index = 0
+        while True:
+            char = self.peek()
+            if char == closing:
+                self.pos += 1
+                return
+            if char == ",":
+                self.pos += 1
+                continue
+            if not char:
+                raise ValueError("unterminated JSON container")
+            if opening == "{":
+                key = self.value()
+                self._expect(":")
+                yield key
+            else:
+                yield index
+                index += 1
@@ -0,0 +1,224 @@
+# Offline replay of stored verification traffic against a candidate policy.
+# Runs the same screening logic as process_verification (find_flagged_entries)
+# with no Discord calls and no writes, and compares the live blacklist config
+# with a candidate one.
+#
+#   python replay_verifications.py --candidate candidate_configs.json
+#   python replay_verifications.py --candidate c.json --journal queue.jsonl --workers 8
+#
+# Input is either user_verification_data.json ({guild: {user: {guild_ids, ...}}})
+# or a JSONL journal of queued verification payloads (user_id, guild_ids,
+# target_guild_id), one per line.
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Only side-effect-free modules: spawn-based pools re-import this file in every worker
+from jsonstream import JSONStream
+from screening import find_flagged_entries
+
+CONFIG_PATH = "server_configs.json"
+FEEDS_PATH = "blacklist_feeds.json"
+
+# Policies handed to each worker process once, via the pool initializer
+_policies = {}
+
+
+def _init_worker(baseline, candidate):
+    _policies["baseline"] = baseline
+    _policies["candidate"] = candidate
+
+
+def load_json(path, default):
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return default
+
+
+def iter_user_data(path):
+    """Yield (guild_id, user_id, guild_ids) from user_verification_data.json, one user at a time"""
+    with open(path, "r", encoding="utf-8") as f:
+        stream = JSONStream(f)
+        for guild_id in stream.items():
+            for user_id in stream.items():
+                record = stream.value()
+                yield guild_id, user_id, record.get("guild_ids", [])
+
+
+def iter_journal(path):
+    """Yield (guild_id, user_id, guild_ids) from a JSONL queue journal, line by line"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            data = json.loads(line)
+            yield str(data.get("target_guild_id")), str(data["user_id"]), data.get("guild_ids", [])
+
+
+def iter_chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _screen(policy, guild_id, guild_ids):
+    configs, feeds = policy
+    return find_flagged_entries(configs.get(guild_id, {}), guild_ids, feeds)
+
+
+def replay_chunk(chunk):
+    """Screen a chunk under both policies and return per-guild counters plus timings"""
+    baseline = _policies["baseline"]
+    candidate = _policies["candidate"]
+    guilds = {}
+    timings = Counter()
+    offenders = Counter()
+
+    for guild_id, user_id, guild_ids in chunk:
+        start = time.perf_counter()
+        before = _screen(baseline, guild_id, guild_ids)
+        middle = time.perf_counter()
+        after = _screen(candidate, guild_id, guild_ids)
+        timings["baseline"] += middle - start
+        timings["candidate"] += time.perf_counter() - middle
+
+        counts = guilds.setdefault(guild_id, Counter())
+        counts["records"] += 1
+        counts["baseline_flagged"] += bool(before)
+        counts["candidate_flagged"] += bool(after)
+        counts["newly_flagged"] += bool(after) and not before
+        counts["newly_cleared"] += bool(before) and not after
+        for sid, _ in after:
+            offenders[sid] += 1
+
+    return guilds, timings, offenders
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its finished workers, in MB"""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) / 1024, 1)
+
+
+def run_replay(records, baseline, candidate, workers, chunk_size):
+    totals = {}
+    timings = Counter()
+    offenders = Counter()
+
+    def merge(result):
+        guilds, chunk_timings, chunk_offenders = result
+        for guild_id, counts in guilds.items():
+            totals.setdefault(guild_id, Counter()).update(counts)
+        timings.update(chunk_timings)
+        offenders.update(chunk_offenders)
+
+    start = time.perf_counter()
+    if workers > 1:
+        # Keep only a couple of chunks per worker in flight so memory stays flat
+        # no matter how large the input is (pool.map would drain the generator)
+        max_in_flight = workers * 2
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(baseline, candidate)) as pool:
+            in_flight = set()
+            for chunk in iter_chunks(records, chunk_size):
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        merge(future.result())
+                in_flight.add(pool.submit(replay_chunk, chunk))
+            for future in in_flight:
+                merge(future.result())
+    else:
+        _init_worker(baseline, candidate)
+        for chunk in iter_chunks(records, chunk_size):
+            merge(replay_chunk(chunk))
+    elapsed = time.perf_counter() - start
+
+    record_count = sum(counts["records"] for counts in totals.values())
+    return {
+        "records": record_count,
+        "elapsed_s": round(elapsed, 3),
+        "records_per_s": round(record_count / elapsed, 1) if elapsed else None,
+        "screening_us_per_record": {
+            policy: round(seconds / record_count * 1e6, 2) if record_count else None
+            for policy, seconds in (("baseline", timings["baseline"]), ("candidate", timings["candidate"]))
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "guilds": {
+            guild_id: dict(counts, delta=counts["candidate_flagged"] - counts["baseline_flagged"])
+            for guild_id, counts in sorted(totals.items())
+        },
+        "top_candidate_offenders": offenders.most_common(10),
+    }
+
+
+def print_report(report):
+    print(f"Replayed {report['records']} records in {report['elapsed_s']}s ({report['records_per_s']} records/s)")
+    cost = report["screening_us_per_record"]
+    print(f"Screening cost: baseline {cost['baseline']} µs/record, candidate {cost['candidate']} µs/record")
+    if report["peak_rss_mb"] is not None:
+        print(f"Peak RSS: {report['peak_rss_mb']} MB")
+    print()
+    print(f"{'guild':<22}{'records':>9}{'before':>9}{'after':>9}{'delta':>8}{'new':>7}{'cleared':>9}")
+    for guild_id, counts in report["guilds"].items():
+        print(
+            f"{guild_id:<22}{counts['records']:>9}{counts['baseline_flagged']:>9}"
+            f"{counts['candidate_flagged']:>9}{counts['delta']:>+8}{counts['newly_flagged']:>7}{counts['newly_cleared']:>9}"
+        )
+    if report["top_candidate_offenders"]:
+        print()
+        print("Top offending servers under the candidate policy:")
+        for sid, count in report["top_candidate_offenders"]:
+            print(f"  {sid}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay stored verifications against a candidate blacklist config")
+    parser.add_argument("--candidate", required=True, help="candidate server_configs.json")
+    parser.add_argument("--candidate-feeds", help="candidate blacklist_feeds.json (defaults to the live feeds)")
+    parser.add_argument("--baseline", default=CONFIG_PATH, help="baseline server_configs.json")
+    parser.add_argument("--baseline-feeds", default=FEEDS_PATH, help="baseline blacklist_feeds.json")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--data", default="user_verification_data.json", help="stored verification records")
+    source.add_argument("--journal", help="JSONL journal of queued verification payloads")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (1 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="records per work unit")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    baseline_feeds = load_json(args.baseline_feeds, {})
+    baseline = (load_json(args.baseline, {}), baseline_feeds)
+    candidate = (
+        load_json(args.candidate, {}),
+        load_json(args.candidate_feeds, {}) if args.candidate_feeds else baseline_feeds,
+    )
+    records = iter_journal(args.journal) if args.journal else iter_user_data(args.data)
+
+    report = run_replay(records, baseline, candidate, max(1, args.workers), max(1, args.chunk_size))
+    if args.json:
+        print(json.dumps(report, indent=4, ensure_ascii=False))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# Blacklist screening shared by the bot (process_verification) and the
+# offline replay tool. Pure functions only: importing this module must not
+# touch Discord, the web app, or any files.
+
+def lookup_blacklisted(config, server_id, feeds):
+    """Return the blacklist name for server_id in this guild, or None.
+
+    Guild entries win over feed entries; feed entries the guild has excluded
+    (copy-on-write overrides) are skipped. Cost depends only on the number of
+    feeds this guild subscribes to, not on how many guilds share a feed.
+    feeds maps feed name -> {"servers": {server_id: name}}.
+    """
+    name = config.get("blacklisted_servers", {}).get(server_id)
+    if name is not None:
+        return name
+    if server_id in config.get("feed_exclusions", {}):
+        return None
+    for feed_name in config.get("subscribed_feeds", []):
+        feed = feeds.get(feed_name)
+        if feed:
+            name = feed["servers"].get(server_id)
+            if name is not None:
+                return name
+    return None
+
+def find_flagged_entries(config, guild_ids, feeds):
+    """Return (server_id, name) for every guild in guild_ids that is blacklisted"""
+    flagged = []
+    for sid in guild_ids:
+        name = lookup_blacklisted(config, sid, feeds)
+        if name is not None:
+            flagged.append((sid, name))
+    return flagged
@@ -6,22 +6,71 @@ import json
 import os
 import asyncio
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, PlainTextResponse
 import httpx
 import uvicorn
 import threading
+import itertools
 import urllib.parse
 import math
+import csv
+import io
+import bisect
+import heapq
+import datetime
+import time
+import secrets
+import hmac
+import hashlib
+import queue
+import contextlib
+import copy
+from collections import OrderedDict, deque, Counter
+import sys
+import traceback
+import re
+import aiohttp
+from jsonstream import JSONStream
+from screening import find_flagged_entries
 
 # ==== Config ====
 
 CLIENT_ID = os.environ.get("CLIENT_ID")
 CLIENT_SECRET = os.environ.get("CLIENT_SECRET")
 BOT_TOKEN = os.environ.get("BOT_TOKEN")
-REDIRECT_URI = "https://ttutt-2.onrender.com/oauth/callback"
+DEFAULT_REDIRECT_URI = "https://ttutt-2.onrender.com/oauth/callback"
+REDIRECT_URI = os.environ.get("REDIRECT_URI", DEFAULT_REDIRECT_URI)
+AUTHORIZE_URL = "https://discord.com/api/oauth2/authorize"
+PANEL_IMAGE_URL = "https://cdn.discordapp.com/attachments/1330685351412498480/1403393124692398162/Screenshot_20250808-1753442.png?ex=68976332&is=689611b2&hm=575bee2a6ed0d2e351e93ebe0ac451230d671f8e4bb3dde98c20dc37ca3ee7b7&"
 
 CONFIG_PATH = "server_configs.json"
 BLACKLISTED_PATH = "blacklisted_servers.json"
+FEEDS_PATH = "blacklist_feeds.json"
+BL_IMPORT_MAX_BYTES = 5 * 1024 * 1024  # roughly 250k server IDs
+# server_configs.json is rewritten by every config command, so a guild's own
+# list stays small; bigger lists belong in a shared feed (blacklist_feeds.json)
+GUILD_BLACKLIST_MAX_ENTRIES = 10000
+STATS_PATH = "verification_stats.json"
+STATS_RETENTION_DAYS = 90
+STATS_FLUSH_SECONDS = 15
+
+# Optional bearer token required by the admin HTTP endpoints
+ADMIN_API_TOKEN = os.environ.get("ADMIN_API_TOKEN")
+
+# Verification tracing: spans go to a local JSONL file, or to an OTLP/HTTP collector if set
+TRACE_EXPORT_PATH = os.environ.get("TRACE_EXPORT_PATH", "verification_traces.jsonl")
+OTLP_ENDPOINT = os.environ.get("OTLP_ENDPOINT")  # e.g. http://localhost:4318/v1/traces
+TRACE_EXPORT_MAX_BYTES = int(os.environ.get("TRACE_EXPORT_MAX_BYTES", str(10 * 1024 * 1024)))
+
+# Dedicated HMAC key for the OAuth state; deliberately not derived from CLIENT_SECRET
+STATE_SECRET = os.environ.get("STATE_SECRET", "").encode() or None
+if STATE_SECRET is None:
+    print("⚠️ WARNING: STATE_SECRET is not set. Verification links will carry the plain guild ID and "
+          "traces will start at the OAuth callback. Set STATE_SECRET to a long random value.")
+
+# Event-loop lag monitor: report any callback that blocks a loop for longer than this
+LOOP_LAG_THRESHOLD_MS = int(os.environ.get("LOOP_LAG_THRESHOLD_MS", "250"))
+PROFILE_MAX_SECONDS = 60
 
 # ==== Load/save JSON utils ====
 
@@ -32,9 +81,37 @@ def load_json(path, default):
     else:
         return default
 
+# Every save takes a sequence number when its data is captured, so a slow
+# background write can never overwrite a newer save of the same file
+_save_seq = itertools.count()
+_save_versions = {}
+_save_lock = threading.Lock()
+
+def _write_json(path, data, seq):
+    text = json.dumps(data, indent=4, ensure_ascii=False)
+    with _save_lock:
+        if _save_versions.get(path, -1) > seq:
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        _save_versions[path] = seq
+
 def save_json(path, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    _write_json(path, data, next(_save_seq))
+
+async def save_json_in_thread(path, snapshot):
+    """Serialize and write from a worker thread; snapshot must not be mutated afterwards"""
+    await asyncio.to_thread(_write_json, path, snapshot, next(_save_seq))
+
+def snapshot_server_configs():
+    """Copy of server_configs that is safe to serialize off the loop (leaf values are immutable)"""
+    return {
+        guild_id: {key: value.copy() if isinstance(value, (dict, list)) else value for key, value in config.items()}
+        for guild_id, config in server_configs.items()
+    }
+
+def snapshot_blacklist_feeds():
+    return {name: dict(feed, servers=dict(feed.get("servers", {}))) for name, feed in blacklist_feeds.items()}
 
 # Server-specific configs: {guild_id: {flag_channel_id, verified_role_id, log_channel_id, blacklisted_servers}}
 server_configs = load_json(CONFIG_PATH, {})
@@ -42,6 +119,10 @@ server_configs = load_json(CONFIG_PATH, {})
 # Global blacklisted servers structure (legacy support)
 blacklisted_servers = load_json(BLACKLISTED_PATH, {})
 
+# Shared blacklist feeds, stored once and referenced by name from guild configs:
+# {feed_name: {"servers": {server_id: server_name}}}
+blacklist_feeds = load_json(FEEDS_PATH, {})
+
 def get_server_config(guild_id):
     guild_str = str(guild_id)
     if guild_str not in server_configs:
@@ -50,17 +131,891 @@ def get_server_config(guild_id):
             "verified_role_id": None,
             "unverified_role_id": None,
             "log_channel_id": None,
-            "blacklisted_servers": {}
+            "blacklisted_servers": {},
+            "subscribed_feeds": [],
+            "feed_exclusions": {}
         }
         save_json(CONFIG_PATH, server_configs)
     return server_configs[guild_str]
 
+# ==== Blacklist editing ====
+
+def add_guild_blacklist_entry(guild_id, server_id, server_name):
+    """Add a server to a guild's own blacklist, lifting any feed exclusion"""
+    config = get_server_config(guild_id)
+    config.setdefault("blacklisted_servers", {})[server_id] = server_name
+    config.get("feed_exclusions", {}).pop(server_id, None)
+    guild_blacklist_index(guild_id).add(server_id, server_name)
+
+def remove_guild_blacklist_entry(guild_id, server_id):
+    """Remove a server from a guild's effective blacklist.
+
+    Guild entries are deleted outright. Entries coming from a subscribed feed
+    are never touched in the shared feed; instead the guild records an
+    exclusion so only its own view changes. Returns the removed name or None.
+    """
+    config = get_server_config(guild_id)
+    name = config.get("blacklisted_servers", {}).pop(server_id, None)
+    if name is not None:
+        guild_blacklist_index(guild_id).remove(server_id)
+    elif server_id in config.get("feed_exclusions", {}):
+        return None  # already excluded, nothing active to remove
+    for feed_name in config.get("subscribed_feeds", []):
+        feed = blacklist_feeds.get(feed_name)
+        if feed and server_id in feed["servers"]:
+            feed_entry = feed["servers"][server_id]
+            config.setdefault("feed_exclusions", {})[server_id] = feed_entry
+            name = name or feed_entry
+            break
+    return name
+
+# ==== Blacklist search index ====
+
+class BlacklistIndex:
+    """Sorted in-memory index over one blacklist source (a guild's own entries or a feed).
+
+    Keeps (lowercase name, id) pairs and ids in sorted lists so prefix lookups
+    and cursor pagination are a bisect away; substring matches fall back to a
+    linear scan that stops as soon as enough results are found.
+    """
+
+    def __init__(self, entries):
+        # Hand-edited JSON can hold non-string names; index them as text
+        self.names = {sid: str(name) for sid, name in entries.items()}
+        self.by_name = sorted((name.lower(), sid) for sid, name in self.names.items())
+        self.by_id = sorted(self.names)
+
+    def add(self, server_id, server_name):
+        if server_id in self.names:
+            self.remove(server_id)
+        self.names[server_id] = server_name
+        bisect.insort(self.by_name, (server_name.lower(), server_id))
+        bisect.insort(self.by_id, server_id)
+
+    def add_many(self, entries):
+        """Bulk insert: sort only the new entries and merge them into the existing lists"""
+        replaced = {sid for sid in entries if sid in self.names}
+        if replaced:
+            self.by_name = [key for key in self.by_name if key[1] not in replaced]
+        entries = {sid: str(name) for sid, name in entries.items()}
+        self.names.update(entries)
+        new_by_name = sorted((name.lower(), sid) for sid, name in entries.items())
+        new_ids = sorted(sid for sid in entries if sid not in replaced)
+        self.by_name = list(heapq.merge(self.by_name, new_by_name))
+        self.by_id = list(heapq.merge(self.by_id, new_ids))
+
+    def remove(self, server_id):
+        name = self.names.pop(server_id, None)
+        if name is None:
+            return
+        key = (name.lower(), server_id)
+        i = bisect.bisect_left(self.by_name, key)
+        if i < len(self.by_name) and self.by_name[i] == key:
+            del self.by_name[i]
+        i = bisect.bisect_left(self.by_id, server_id)
+        if i < len(self.by_id) and self.by_id[i] == server_id:
+            del self.by_id[i]
+
+    def _id_prefix(self, prefix):
+        i = bisect.bisect_left(self.by_id, prefix)
+        while i < len(self.by_id) and self.by_id[i].startswith(prefix):
+            yield self.by_id[i]
+            i += 1
+
+    def _name_prefix(self, prefix):
+        i = bisect.bisect_left(self.by_name, (prefix,))
+        while i < len(self.by_name) and self.by_name[i][0].startswith(prefix):
+            yield self.by_name[i][1]
+            i += 1
+
+    def search(self, query):
+        """Yield matching server IDs: id/name prefix matches first, then substrings"""
+        query = query.lower().strip()
+        if not query:
+            for _, sid in self.by_name:
+                yield sid
+            return
+        seen = set()
+        for sid in self._id_prefix(query):
+            seen.add(sid)
+            yield sid
+        for sid in self._name_prefix(query):
+            if sid not in seen:
+                seen.add(sid)
+                yield sid
+        for term, sid in self.by_name:
+            if sid not in seen and (query in term or query in sid):
+                yield sid
+
+    def after(self, cursor):
+        """Yield ((lowercase name, id), name) pairs in sort order, strictly after cursor"""
+        i = bisect.bisect_right(self.by_name, cursor) if cursor else 0
+        for key in self.by_name[i:]:
+            yield key, self.names[key[1]]
+
+blacklist_indexes = {}
+
+def guild_blacklist_index(guild_id):
+    key = ("guild", str(guild_id))
+    if key not in blacklist_indexes:
+        config = get_server_config(guild_id)
+        blacklist_indexes[key] = BlacklistIndex(config.get("blacklisted_servers", {}))
+    return blacklist_indexes[key]
+
+def feed_blacklist_index(feed_name):
+    key = ("feed", feed_name)
+    if key not in blacklist_indexes:
+        blacklist_indexes[key] = BlacklistIndex(blacklist_feeds.get(feed_name, {}).get("servers", {}))
+    return blacklist_indexes[key]
+
+async def warm_blacklist_indexes(guild_ids):
+    """Build every guild and feed index in a worker thread before the first autocomplete.
+
+    Sources are snapshotted on the loop so the thread never sees a dict being
+    mutated; an index that was built lazily in the meantime is kept as is.
+    """
+    sources = [(("feed", name), feed.get("servers", {})) for name, feed in blacklist_feeds.items()]
+    for guild_id in guild_ids:
+        config = server_configs.get(str(guild_id))
+        if config:
+            sources.append((("guild", str(guild_id)), config.get("blacklisted_servers", {})))
+    for key, entries in sources:
+        if key in blacklist_indexes:
+            continue
+        index = await asyncio.to_thread(BlacklistIndex, dict(entries))
+        blacklist_indexes.setdefault(key, index)
+
+async def warm_blacklist_indexes_in_background(guild_ids):
+    """Startup wrapper: a bad source only costs its index (built lazily later), never the bot"""
+    try:
+        await warm_blacklist_indexes(guild_ids)
+        print("Blacklist search indexes built.")
+    except Exception:
+        print("Blacklist index warm-up failed; indexes will be built on first use.")
+        traceback.print_exc()
+
+def _blacklist_sources(guild_id):
+    """Return (source, index) for the guild's own list followed by each subscribed feed"""
+    config = get_server_config(guild_id)
+    sources = [(None, guild_blacklist_index(guild_id))]
+    for feed_name in config.get("subscribed_feeds", []):
+        if feed_name in blacklist_feeds:
+            sources.append((feed_name, feed_blacklist_index(feed_name)))
+    return config, sources
+
+def _is_effective(config, sources, position, server_id):
+    """True if the entry at sources[position] is the one lookup_blacklisted would use"""
+    if position == 0:
+        return True
+    if server_id in config.get("blacklisted_servers", {}) or server_id in config.get("feed_exclusions", {}):
+        return False
+    return not any(server_id in index.names for _, index in sources[1:position])
+
+def search_guild_blacklist(guild_id, query, limit=25):
+    """Return up to limit (server_id, name, source) entries matching query"""
+    config, sources = _blacklist_sources(guild_id)
+    results = []
+    seen = set()
+    for position, (source, index) in enumerate(sources):
+        for sid in index.search(query):
+            if sid in seen or not _is_effective(config, sources, position, sid):
+                continue
+            seen.add(sid)
+            results.append((sid, index.names[sid], source))
+            if len(results) >= limit:
+                return results
+    return results
+
+def page_guild_blacklist(guild_id, cursor=None, limit=10, query=None):
+    """Return (entries, next_cursor) for one page of the guild's effective blacklist.
+
+    Entries are ordered by (lowercase name, id) across all sources; cursor is
+    the sort key of the last entry on the previous page, or None for the first.
+    """
+    config, sources = _blacklist_sources(guild_id)
+    query = query.lower().strip() if query else None
+    def stream(position, source, index):
+        for key, name in index.after(cursor):
+            yield key, position, name, source
+
+    streams = [stream(position, source, index) for position, (source, index) in enumerate(sources)]
+    entries = []
+    last_key = None
+    for key, position, name, source in heapq.merge(*streams):
+        sid = key[1]
+        if query and query not in key[0] and query not in sid:
+            continue
+        if not _is_effective(config, sources, position, sid):
+            continue
+        if len(entries) == limit:
+            return entries, last_key
+        entries.append((sid, name, source))
+        last_key = key
+    return entries, None
+
+# ==== Blacklist import ====
+
+def _blacklist_entry_from_json(item):
+    """Normalise one JSON item into (server_id, server_name)"""
+    if isinstance(item, (int, str)):
+        return str(item).strip(), None
+    if isinstance(item, dict):
+        sid = item.get("id", item.get("server_id"))
+        name = item.get("name", item.get("server_name"))
+        return (str(sid).strip() if sid is not None else ""), name
+    return "", None
+
+def _is_ndjson(f, filename):
+    """True if the file holds one JSON item per line rather than a single document"""
+    if filename.lower().endswith((".ndjson", ".jsonl")):
+        return True
+    f.seek(0)
+    first = f.readline().strip()
+    f.seek(0)
+    try:
+        item = json.loads(first)
+    except json.JSONDecodeError:
+        return False
+    return isinstance(item, dict) and ("id" in item or "server_id" in item)
+
+def iter_blacklist_file(f, filename):
+    """Stream (server_id, server_name) pairs out of an uploaded CSV or JSON file.
+
+    f is a seekable text file object; rows are decoded one at a time so the
+    whole document is never built in memory.
+    CSV: one server per row, "id[,name]", optional header row.
+    JSON: a {id: name} object, a list of ids or {"id", "name"} objects, or
+    newline-delimited JSON with one such item per line.
+    Rows without a numeric ID are yielded with an empty ID so the caller can count them.
+    """
+    stream = JSONStream(f)
+    if filename.lower().endswith((".json", ".ndjson", ".jsonl")) or stream.peek() in ("{", "["):
+        if _is_ndjson(f, filename):
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield _blacklist_entry_from_json(json.loads(line))
+                except json.JSONDecodeError:
+                    yield "", None
+            return
+
+        stream = JSONStream(f)
+        is_object = stream.peek() == "{"
+        for key in stream.items():
+            item = stream.value()
+            if is_object:
+                name = item.get("name") if isinstance(item, dict) else item
+                yield str(key).strip(), name
+            else:
+                yield _blacklist_entry_from_json(item)
+        return
+
+    f.seek(0)
+    for index, row in enumerate(csv.reader(f)):
+        if not row or not row[0].strip():
+            continue
+        sid = row[0].strip()
+        if index == 0 and not sid.isdigit():
+            continue  # header row
+        name = row[1].strip() if len(row) > 1 and row[1].strip() else None
+        yield sid, name
+
+def parse_blacklist_file(raw, filename):
+    """Parse an uploaded blacklist file into ({server_id: server_name}, invalid_count)"""
+    entries = {}
+    invalid = 0
+    with io.TextIOWrapper(io.BytesIO(raw), encoding="utf-8-sig", errors="replace", newline="") as f:
+        for sid, name in iter_blacklist_file(f, filename):
+            if not sid.isdigit():
+                invalid += 1
+                continue
+            entries[sid] = str(name) if name else sid
+    return entries, invalid
+
+# ==== Verification analytics ====
+
+# Aggregates maintained incrementally by process_verification:
+# {guild_id: {"days": {"YYYY-MM-DD": {"passed": n, "flagged": n}},
+#             "offenders": {server_id: {"name": str, "count": n}},
+#             "guild_counts": {guild_count: users}}}
+verification_stats = load_json(STATS_PATH, {})
+stats_dirty = False
+
+def get_guild_stats(guild_id, user_data=None):
+    """Return the aggregate record for a guild, creating it on first use.
+
+    A new record's guild-count histogram is seeded once from any users
+    already stored in user_data so the median covers pre-existing records.
+    """
+    guild_str = str(guild_id)
+    if guild_str not in verification_stats:
+        histogram = {}
+        for record in (user_data or {}).get(guild_str, {}).values():
+            key = str(len(record.get("guild_ids", [])))
+            histogram[key] = histogram.get(key, 0) + 1
+        verification_stats[guild_str] = {"days": {}, "offenders": {}, "guild_counts": histogram}
+    return verification_stats[guild_str]
+
+def record_guild_count(guild_id, guild_count, previous_guild_count=None, user_data=None):
+    """Move a user's entry in the guild-count histogram to its new value"""
+    histogram = get_guild_stats(guild_id, user_data)["guild_counts"]
+    if previous_guild_count is not None:
+        old_key = str(previous_guild_count)
+        if histogram.get(old_key, 0) > 0:
+            histogram[old_key] -= 1
+            if not histogram[old_key]:
+                del histogram[old_key]
+    key = str(guild_count)
+    histogram[key] = histogram.get(key, 0) + 1
+    mark_stats_dirty()
+
+def record_verification_outcome(guild_id, flagged_entries, when=None):
+    """Count a pass or flag in today's bucket and credit each offending server"""
+    stats = get_guild_stats(guild_id)
+    day = (when or discord.utils.utcnow()).date().isoformat()
+    bucket = stats["days"].setdefault(day, {"passed": 0, "flagged": 0})
+    bucket["flagged" if flagged_entries else "passed"] += 1
+
+    for sid, name in flagged_entries:
+        offender = stats["offenders"].setdefault(sid, {"name": name, "count": 0})
+        offender["name"] = name
+        offender["count"] += 1
+
+    # Buckets are ISO dates, so lexical order is chronological
+    while len(stats["days"]) > STATS_RETENTION_DAYS:
+        del stats["days"][min(stats["days"])]
+
+    mark_stats_dirty()
+
+def mark_stats_dirty():
+    """Schedule the aggregates for the next batched write instead of saving per verification"""
+    global stats_dirty
+    stats_dirty = True
+
+def _write_text(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+@tasks.loop(seconds=STATS_FLUSH_SECONDS)
+async def flush_stats_task():
+    """Write pending aggregate changes at most every STATS_FLUSH_SECONDS, off the event loop"""
+    global stats_dirty
+    if not stats_dirty:
+        return
+    stats_dirty = False
+    # Snapshot on the loop (compact, no indent), write the file from a thread
+    snapshot = json.dumps(verification_stats, ensure_ascii=False)
+    await asyncio.to_thread(_write_text, STATS_PATH, snapshot)
+
+def histogram_median(histogram):
+    """Median of a {value: count} histogram with string keys"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    lower_rank, upper_rank = (total - 1) // 2, total // 2
+    lower = upper = None
+    seen = 0
+    for value in sorted(histogram, key=int):
+        seen += histogram[value]
+        if lower is None and seen > lower_rank:
+            lower = int(value)
+        if seen > upper_rank:
+            upper = int(value)
+            break
+    return (lower + upper) / 2
+
+def summarize_guild_stats(guild_id, days=7, top=5):
+    """Build the /security-stats payload from the stored aggregates"""
+    stats = verification_stats.get(str(guild_id), {"days": {}, "offenders": {}, "guild_counts": {}})
+    today = discord.utils.utcnow().date()
+    series = []
+    for offset in range(days - 1, -1, -1):
+        day = (today - datetime.timedelta(days=offset)).isoformat()
+        bucket = stats["days"].get(day, {"passed": 0, "flagged": 0})
+        series.append({"date": day, "passed": bucket["passed"], "flagged": bucket["flagged"]})
+
+    offenders = heapq.nlargest(top, list(stats["offenders"].items()), key=lambda item: item[1]["count"])
+    return {
+        "guild_id": str(guild_id),
+        "days": days,
+        "passed": sum(bucket["passed"] for bucket in series),
+        "flagged": sum(bucket["flagged"] for bucket in series),
+        "daily": series,
+        "top_offenders": [
+            {"server_id": sid, "name": entry["name"], "flags": entry["count"]}
+            for sid, entry in offenders
+        ],
+        "median_guild_count": histogram_median(dict(stats["guild_counts"])),
+        "users": sum(stats["guild_counts"].values()),
+    }
+
+# ==== Verification tracing ====
+
+def sign_state(guild_id, trace_id):
+    """Build the OAuth state value "<guild_id>.<trace_id>.<signature>" (plain guild ID without STATE_SECRET)"""
+    if STATE_SECRET is None:
+        return str(guild_id)
+    payload = f"{guild_id}.{trace_id}"
+    signature = hmac.new(STATE_SECRET, payload.encode(), hashlib.sha256).hexdigest()[:32]
+    return f"{payload}.{signature}"
+
+def parse_state(state):
+    """Return (guild_id, trace_id) from an OAuth state value.
+
+    Panel direct links are signed with an empty trace ID and so carry no trace.
+    Plain guild IDs (panels posted before states were signed, or any link
+    when STATE_SECRET is unset) are still accepted. Raises ValueError on a
+    bad signature.
+    """
+    if state.isdigit():
+        return int(state), None
+    if STATE_SECRET is None:
+        raise ValueError("signed state received but STATE_SECRET is not set")
+    guild_id, trace_id, signature = state.split(".")
+    expected = hmac.new(STATE_SECRET, f"{guild_id}.{trace_id}".encode(), hashlib.sha256).hexdigest()[:32]
+    if not hmac.compare_digest(signature, expected):
+        raise ValueError("invalid state signature")
+    return int(guild_id), trace_id or None
+
+class SpanExporter:
+    """Writes finished traces from a background thread so neither event loop blocks on I/O"""
+
+    def __init__(self, path=None, otlp_endpoint=None, max_bytes=None):
+        self.path = path
+        self.otlp_endpoint = otlp_endpoint
+        self.max_bytes = max_bytes
+        self.pending = queue.Queue()
+        threading.Thread(target=self._run, daemon=True, name="span-exporter").start()
+
+    def export(self, trace):
+        self.pending.put(trace)
+
+    def _run(self):
+        while True:
+            trace = self.pending.get()
+            try:
+                if self.otlp_endpoint:
+                    httpx.post(self.otlp_endpoint, json=self._to_otlp(trace), timeout=5)
+                elif self.path:
+                    self._rotate_if_full()
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(trace, ensure_ascii=False) + "\n")
+            except Exception as e:
+                print(f"Trace export failed: {e}")
+
+    def _rotate_if_full(self):
+        """Keep at most one rotated file (<path>.1) so traces never grow without bound"""
+        if not self.max_bytes:
+            return
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except FileNotFoundError:
+            return
+        os.replace(self.path, f"{self.path}.1")
+
+    def _to_otlp(self, trace):
+        def attributes(attrs):
+            return [{"key": k, "value": {"stringValue": str(v)}} for k, v in attrs.items()]
+
+        root_id = secrets.token_hex(8)
+        spans = [{
+            "traceId": trace["trace_id"],
+            "spanId": root_id,
+            "name": "verification",
+            "startTimeUnixNano": int(trace["start"] * 1e9),
+            "endTimeUnixNano": int(trace["end"] * 1e9),
+            "attributes": attributes({"guild_id": trace["guild_id"], "status": trace["status"]}),
+        }]
+        for span in trace["spans"]:
+            spans.append({
+                "traceId": trace["trace_id"],
+                "spanId": secrets.token_hex(8),
+                "parentSpanId": root_id,
+                "name": span["name"],
+                "startTimeUnixNano": int(span["start"] * 1e9),
+                "endTimeUnixNano": int(span["end"] * 1e9),
+                "attributes": attributes(span.get("attributes", {})),
+            })
+        return {"resourceSpans": [{
+            "resource": {"attributes": attributes({"service.name": "security-bot"})},
+            "scopeSpans": [{"scope": {"name": "verification"}, "spans": spans}],
+        }]}
+
+class VerificationTracer:
+    """Collects spans for each verification from button click to role grant.
+
+    Traces are shared between the bot thread and the uvicorn thread, so all
+    access goes through a lock. Unfinished traces (users who never complete
+    OAuth) are evicted oldest-first once MAX_ACTIVE is reached.
+    """
+
+    MAX_ACTIVE = 2000
+    MAX_RECENT = 200
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+        self.lock = threading.Lock()
+        self.active = OrderedDict()
+        self.recent = deque(maxlen=self.MAX_RECENT)
+
+    def start_trace(self, guild_id, trace_id=None):
+        trace_id = trace_id or secrets.token_hex(16)
+        with self.lock:
+            self.active[trace_id] = {
+                "trace_id": trace_id,
+                "guild_id": str(guild_id),
+                "start": time.time(),
+                "spans": [],
+            }
+            while len(self.active) > self.MAX_ACTIVE:
+                self.active.popitem(last=False)
+        return trace_id
+
+    def ensure_trace(self, guild_id, trace_id):
+        """Resume trace_id if it is still active, otherwise start it fresh"""
+        with self.lock:
+            if trace_id and trace_id in self.active:
+                return trace_id
+        return self.start_trace(guild_id, trace_id)
+
+    def record_span(self, trace_id, name, start, end, **attributes):
+        if not trace_id:
+            return
+        with self.lock:
+            trace = self.active.get(trace_id)
+            if trace is not None:
+                trace["spans"].append({"name": name, "start": start, "end": end, "attributes": attributes})
+
+    def last_span_end(self, trace_id):
+        with self.lock:
+            trace = self.active.get(trace_id)
+            if not trace:
+                return None
+            return max((span["end"] for span in trace["spans"]), default=trace["start"])
+
+    @contextlib.contextmanager
+    def span(self, trace_id, name, **attributes):
+        start = time.time()
+        try:
+            yield attributes
+        finally:
+            self.record_span(trace_id, name, start, time.time(), **attributes)
+
+    def finish_trace(self, trace_id, status):
+        if not trace_id:
+            return
+        with self.lock:
+            trace = self.active.pop(trace_id, None)
+            if trace is None:
+                return
+            trace["end"] = time.time()
+            trace["status"] = status
+            trace["duration_ms"] = round((trace["end"] - trace["start"]) * 1000, 1)
+            self.recent.append(trace)
+        self.exporter.export(trace)
+
+    def slowest(self, count=5):
+        with self.lock:
+            recent = list(self.recent)
+        return heapq.nlargest(count, recent, key=lambda trace: trace["duration_ms"])
+
+tracer = VerificationTracer(SpanExporter(TRACE_EXPORT_PATH, OTLP_ENDPOINT, TRACE_EXPORT_MAX_BYTES))
+
+# ==== Runtime profiling ====
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+def _collapse_stack(thread_name, frame):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+profile_lock = threading.Lock()
+
+def sample_profile(seconds, interval=0.005):
+    """Sample every thread's stack for `seconds` and return collapsed stacks.
+
+    The output is the "frame;frame;frame count" format understood by
+    flamegraph.pl, speedscope and similar tools. Runs in the calling thread,
+    so call it via asyncio.to_thread from a coroutine. Returns None if
+    another profile is already running.
+    """
+    if not profile_lock.acquire(blocking=False):
+        return None
+    try:
+        me = threading.get_ident()
+        counts = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    counts[_collapse_stack(names.get(ident, str(ident)), frame)] += 1
+            time.sleep(interval)
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+    finally:
+        profile_lock.release()
+
+class LoopLagMonitor:
+    """Watchdog that reports event-loop stalls together with the blocking stack.
+
+    Each monitored loop runs a heartbeat task; a separate thread notices when
+    a heartbeat goes stale and dumps the loop thread's current stack, which is
+    the callback doing the blocking.
+    """
+
+    def __init__(self, threshold_ms, interval=0.05):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.heartbeats = {}  # thread ident -> [loop name, last beat, stall reported]
+        self.watchdog = None
+
+    def attach(self, name):
+        """Start monitoring the running loop; call from inside it"""
+        ident = threading.get_ident()
+        with self.lock:
+            if ident in self.heartbeats:
+                return
+            self.heartbeats[ident] = [name, time.monotonic(), False]
+            if self.watchdog is None:
+                self.watchdog = threading.Thread(target=self._watch, daemon=True, name="loop-lag-monitor")
+                self.watchdog.start()
+        asyncio.get_running_loop().create_task(self._beat(ident))
+
+    async def _beat(self, ident):
+        while True:
+            await asyncio.sleep(self.interval)
+            with self.lock:
+                entry = self.heartbeats[ident]
+                stalled_for = time.monotonic() - entry[1]
+                reported = entry[2]
+                entry[1] = time.monotonic()
+                entry[2] = False
+            if reported:
+                print(f"⏱️ Event loop '{entry[0]}' recovered after {stalled_for * 1000:.0f} ms")
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.monotonic()
+            with self.lock:
+                stalled = [
+                    (ident, entry) for ident, entry in self.heartbeats.items()
+                    if not entry[2] and now - entry[1] - self.interval > self.threshold
+                ]
+                for _, entry in stalled:
+                    entry[2] = True
+            frames = sys._current_frames()
+            for ident, entry in stalled:
+                frame = frames.get(ident)
+                stack = "".join(traceback.format_stack(frame)) if frame else "<stack unavailable>"
+                print(f"⏱️ Event loop '{entry[0]}' blocked for over {self.threshold * 1000:.0f} ms, current stack:\n{stack}")
+
+loop_monitor = LoopLagMonitor(LOOP_LAG_THRESHOLD_MS)
+
+# ==== Outbound REST scheduler ====
+
+LANE_CRITICAL = 0  # role grants/removals for users waiting on verification
+LANE_NOTIFY = 1    # verification DMs, flag alerts, panels
+LANE_BULK = 2      # log channel messages and announcements
+LANE_NAMES = {LANE_CRITICAL: "verification", LANE_NOTIFY: "notifications", LANE_BULK: "logs"}
+
+_API_PREFIX = re.compile(r"^/api(?:/v\d+)?")
+_SNOWFLAKE = re.compile(r"^\d{15,21}$")
+
+def route_template(method, path):
+    """Return (template, major_id) for a REST path, mirroring Discord's bucket keys.
+
+    The first channel/guild/webhook ID is the bucket's major parameter; every
+    other snowflake is collapsed so e.g. all role edits in a guild share a key.
+    """
+    parts = _API_PREFIX.sub("", path).strip("/").split("/")
+    major = ""
+    for i, part in enumerate(parts):
+        if _SNOWFLAKE.match(part):
+            if not major and i > 0 and parts[i - 1] in ("channels", "guilds", "webhooks"):
+                major = part
+            parts[i] = ":id"
+    return f"{method} /{'/'.join(parts)}", major
+
+class OutboundScheduler:
+    """Priority scheduler for every outbound Discord REST call the bot makes.
+
+    Jobs are queued per lane and always drained most-critical-first. One worker
+    serves only the verification lane, so a backlog of logs or announcements
+    can never occupy every worker. Bucket limits are learned from the
+    X-RateLimit-* headers of real responses (see observe_response) and used to
+    hold requests back before Discord would answer with a 429; lower lanes
+    also leave the last request of a bucket to the verification lane.
+    """
+
+    WORKER_LANES = (LANE_CRITICAL, LANE_NOTIFY, LANE_BULK, LANE_BULK)
+    GLOBAL_PER_SECOND = 50
+    LOW_LANE_RESERVE = 1
+
+    def __init__(self):
+        self.lanes = {lane: deque() for lane in LANE_NAMES}
+        self.wakeup = None
+        self.workers = {}        # max lane -> list of worker tasks
+        self.route_buckets = {}  # route template -> X-RateLimit-Bucket hash
+        self.buckets = {}        # "<bucket>:<major>" -> {"limit", "remaining", "reset_at"}
+        self.global_reset_at = 0
+        self.dispatched = deque(maxlen=self.GLOBAL_PER_SECOND)
+        self.delays = {lane: deque(maxlen=500) for lane in LANE_NAMES}
+
+    def _ensure_started(self):
+        if self.wakeup is None:
+            self.wakeup = asyncio.Event()
+            for max_lane in self.WORKER_LANES:
+                self._start_worker(max_lane)
+
+    def _start_worker(self, max_lane):
+        task = asyncio.get_running_loop().create_task(self._worker(max_lane))
+        self.workers.setdefault(max_lane, []).append(task)
+        task.add_done_callback(lambda done: self._on_worker_exit(max_lane, done))
+
+    def _on_worker_exit(self, max_lane, task):
+        """Drop a finished worker and replace it unless it was cancelled on purpose"""
+        self.workers[max_lane].remove(task)
+        if task.cancelled():
+            return
+        print(f"Outbound worker for lane <= {LANE_NAMES[max_lane]} died: {task.exception()!r}; restarting")
+        self._start_worker(max_lane)
+
+    def submit(self, lane, method, path, factory):
+        """Queue factory() (a coroutine function) and return a future for its result"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self.lanes[lane].append((time.monotonic(), method, path, factory, future))
+        self.wakeup.set()
+        return future
+
+    async def run(self, lane, method, path, factory):
+        """Queue factory() and wait for it; exceptions propagate to the caller"""
+        return await self.submit(lane, method, path, factory)
+
+    def _next_job(self, max_lane):
+        for lane in range(max_lane + 1):
+            if self.lanes[lane]:
+                return lane, self.lanes[lane].popleft()
+        return None
+
+    async def _worker(self, max_lane):
+        while True:
+            job = self._next_job(max_lane)
+            if job is None:
+                # Every worker re-checks the lanes before waiting, so clearing here loses no wakeups
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            lane, (enqueued, method, path, factory, future) = job
+            if future.cancelled():
+                continue
+            try:
+                await self._pace(lane, self.bucket_key(method, path))
+                self.delays[lane].append(time.monotonic() - enqueued)
+                result = await factory()
+            except asyncio.CancelledError:
+                future.cancel()
+                task = asyncio.current_task()
+                if getattr(task, "cancelling", lambda: 0)():
+                    raise  # the worker itself is being shut down
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                # KeyboardInterrupt/SystemExit and the like still leave the caller settled
+                if not future.done():
+                    future.set_exception(RuntimeError("outbound request aborted"))
+
+    def bucket_key(self, method, path):
+        template, major = route_template(method, path)
+        return f"{self.route_buckets.get(template, template)}:{major}"
+
+    async def _pace(self, lane, key):
+        reserve = 0 if lane == LANE_CRITICAL else self.LOW_LANE_RESERVE
+        while True:
+            now = time.monotonic()
+            wait = self.global_reset_at - now
+            state = self.buckets.get(key)
+            if state:
+                if state["reset_at"] <= now:
+                    state["remaining"] = state["limit"]
+                elif state["remaining"] <= reserve:
+                    wait = max(wait, state["reset_at"] - now)
+            if len(self.dispatched) == self.dispatched.maxlen:
+                wait = max(wait, 1 - (now - self.dispatched[0]))
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        if state:
+            state["remaining"] -= 1  # optimistic; corrected by the response headers
+        self.dispatched.append(time.monotonic())
+
+    def observe_response(self, method, path, status, headers):
+        """Learn bucket state from a REST response's rate-limit headers"""
+        template, major = route_template(method, path)
+        bucket = headers.get("X-RateLimit-Bucket")
+        if bucket:
+            self.route_buckets[template] = bucket
+        now = time.monotonic()
+        if status == 429 and headers.get("X-RateLimit-Global"):
+            self.global_reset_at = now + float(headers.get("Retry-After", 1))
+            return
+        if "X-RateLimit-Remaining" not in headers:
+            return
+        self.buckets[f"{bucket or template}:{major}"] = {
+            "limit": int(headers.get("X-RateLimit-Limit", 1)),
+            "remaining": int(headers["X-RateLimit-Remaining"]),
+            "reset_at": now + float(headers.get("X-RateLimit-Reset-After", 0)),
+        }
+
+    def lane_stats(self):
+        """Queue depth and queueing-delay percentiles (ms) per lane"""
+        stats = {}
+        for lane, name in LANE_NAMES.items():
+            delays = sorted(self.delays[lane])
+            def pct(p):
+                return round(delays[min(len(delays) - 1, int(p * len(delays)))] * 1000, 1) if delays else None
+            stats[name] = {
+                "queued": len(self.lanes[lane]),
+                "samples": len(delays),
+                "p50_ms": pct(0.50),
+                "p95_ms": pct(0.95),
+                "max_ms": round(delays[-1] * 1000, 1) if delays else None,
+            }
+        return stats
+
+outbound = OutboundScheduler()
+
+def dm_route(user):
+    """REST path a DM to user will hit (opening the DM channel first if needed)"""
+    return f"/channels/{user.dm_channel.id}/messages" if user.dm_channel else "/users/@me/channels"
+
+async def _on_rest_response(session, context, params):
+    outbound.observe_response(params.method, params.url.path, params.response.status, params.response.headers)
+
+rest_trace = aiohttp.TraceConfig()
+rest_trace.on_request_end.append(_on_rest_response)
+
 # ==== Discord Bot setup ====
 
 intents = discord.Intents.default()
 intents.members = True
 intents.guilds = True
-bot = commands.Bot(command_prefix=";", intents=intents)
+bot = commands.Bot(command_prefix=";", intents=intents, http_trace=rest_trace)
 
 def is_admin(interaction: discord.Interaction) -> bool:
     return interaction.user.guild_permissions.administrator
@@ -85,7 +1040,13 @@ async def on_ready():
         print("Commands synced.")
     except Exception as e:
         print(f"Sync failed: {e}")
-    verify_task.start()
+    loop_monitor.attach("discord-bot")
+    if not verify_task.is_running():
+        verify_task.start()
+    if not flush_stats_task.is_running():
+        flush_stats_task.start()
+    # Queue draining must not wait on (or die with) the index warm-up
+    bot.loop.create_task(warm_blacklist_indexes_in_background([guild.id for guild in bot.guilds]))
 
 @bot.event
 async def on_guild_join(guild):
@@ -132,7 +1093,7 @@ async def on_guild_join(guild):
         )
         embed.set_footer(text="Use /help-security for more commands")
 
-        await log_channel.send(embed=embed)
+        await outbound.run(LANE_BULK, "POST", f"/channels/{log_channel.id}/messages", lambda: log_channel.send(embed=embed))
 
         # Notify bot owner
         await notify_bot_owner_server_join(guild)
@@ -190,7 +1151,7 @@ async def notify_bot_owner_server_join(guild):
             view = discord.ui.View()
             view.add_item(leave_button)
 
-            await owner.send(embed=embed, view=view)
+            await outbound.run(LANE_NOTIFY, "POST", dm_route(owner), lambda: owner.send(embed=embed, view=view))
             print(f"Notified bot owner about joining guild: {guild.name}")
         else:
             print(f"Could not find bot owner with ID {BOT_OWNER_ID}")
@@ -213,7 +1174,7 @@ async def log_action(guild_id, title, description, color=0x0099FF):
                 timestamp=discord.utils.utcnow()
             )
             embed.set_footer(text="Security Bot Logs", icon_url=bot.user.avatar.url if bot.user.avatar else None)
-            await log_channel.send(embed=embed)
+            await outbound.run(LANE_BULK, "POST", f"/channels/{log_channel.id}/messages", lambda: log_channel.send(embed=embed))
 
 # Verification queue to receive data from webserver
 verification_queue = asyncio.Queue()
@@ -224,140 +1185,275 @@ async def verify_task():
         print(f"Processing {verification_queue.qsize()} items in verification queue")
     while not verification_queue.empty():
         data = await verification_queue.get()
+        if data.get("enqueued_at"):
+            tracer.record_span(data.get("trace_id"), "queue_wait", data["enqueued_at"], time.time())
         print("Retrieved data from verification queue, processing...")
         await process_verification(data)
 
 async def process_verification(data):
     """
     data dict keys:
-    user_id (int), username (str), discriminator (str), guild_ids (list of str), target_guild_id (int)
+    user_id (int), username (str), discriminator (str), guild_ids (list of str), target_guild_id (int),
+    trace_id (str, optional), enqueued_at (float, optional)
     """
-    user_id = data["user_id"]
-    guild_ids = data["guild_ids"]
-    username = data["username"]
-    target_guild_id = data.get("target_guild_id")
-
-    print(f"Processing verification for user {username} ({user_id})")
-    print(f"User is in {len(guild_ids)} servers: {guild_ids}")
-
-    # Store user verification data
-    user_data = load_json("user_verification_data.json", {})
-    guild_str = str(target_guild_id)
-    if guild_str not in user_data:
-        user_data[guild_str] = {}
+    trace_id = data.get("trace_id")
+    status = "error"
+    try:
+        user_id = data["user_id"]
+        guild_ids = data["guild_ids"]
+        username = data["username"]
+        target_guild_id = data.get("target_guild_id")
+
+        print(f"Processing verification for user {username} ({user_id})")
+        print(f"User is in {len(guild_ids)} servers: {guild_ids}")
+
+        # Store user verification data
+        store_start = time.time()
+        user_data = load_json("user_verification_data.json", {})
+        guild_str = str(target_guild_id)
+        if guild_str not in user_data:
+            user_data[guild_str] = {}
+
+        previous = user_data[guild_str].get(str(user_id))
+        record_guild_count(
+            target_guild_id,
+            len(guild_ids),
+            len(previous["guild_ids"]) if previous else None,
+            user_data
+        )
     
-    user_data[guild_str][str(user_id)] = {
-        "username": username,
-        "guild_ids": guild_ids,
-        "timestamp": discord.utils.utcnow().isoformat()
-    }
-    save_json("user_verification_data.json", user_data)
-
-    guild = bot.get_guild(target_guild_id)
-    if not guild:
-        print("Bot not in target guild!")
-        return
-    member = guild.get_member(user_id)
-    if not member:
-        print(f"User {user_id} not in guild.")
-        return
-
-    print(f"Found member: {member.display_name}")
-
-    config = get_server_config(guild.id)
-    server_blacklisted = config.get("blacklisted_servers", {})
-
-    print(f"Checking against blacklisted server IDs: {list(server_blacklisted.keys())}")
-    print(f"User's guild IDs: {guild_ids}")
-
-    flagged_servers = [
-        server_blacklisted[sid]
-        for sid in server_blacklisted
-        if sid in guild_ids
-    ]
-
-    print(f"Blacklisted servers found: {flagged_servers}")
+        user_data[guild_str][str(user_id)] = {
+            "username": username,
+            "guild_ids": guild_ids,
+            "timestamp": discord.utils.utcnow().isoformat()
+        }
+        save_json("user_verification_data.json", user_data)
+        tracer.record_span(trace_id, "store_user_data", store_start, time.time())
+
+        guild = bot.get_guild(target_guild_id)
+        if not guild:
+            print("Bot not in target guild!")
+            status = "guild_not_found"
+            return
+        member = guild.get_member(user_id)
+        if not member:
+            print(f"User {user_id} not in guild.")
+            status = "member_not_found"
+            return
+
+        print(f"Found member: {member.display_name}")
 
-    flag_channel = bot.get_channel(config.get("flag_channel_id")) if config.get("flag_channel_id") else None
+        config = get_server_config(guild.id)
 
-    if flagged_servers:
-        print(f"User {username} is in blacklisted servers: {flagged_servers}")
-        if flag_channel:
-            embed = discord.Embed(
-                title="🚨 Security Alert - User Flagged",
-                description=f"**User:** {member.mention}\n**Status:** ⚠️ Flagged during verification\n**Reason:** Member of blacklisted servers",
-                color=0xFF4444  # Bright red
-            )
-            embed.add_field(
-                name="🔒 Blacklisted Servers",
-                value=f"```\n{chr(10).join(flagged_servers)}```",
-                inline=False
-            )
-            embed.add_field(
-                name="👤 User Info",
-                value=f"**Username:** {username}\n**ID:** {user_id}\n**Mention:** {member.mention}",
-                inline=True
-            )
-            embed.add_field(
-                name="📊 Server Count",
-                value=f"**Total Servers:** {len(guild_ids)}\n**Flagged:** {len(flagged_servers)}",
-                inline=True
-            )
-            embed.set_footer(text="Security Verification System", icon_url=bot.user.avatar.url if bot.user.avatar else None)
-            embed.timestamp = discord.utils.utcnow()
-            await flag_channel.send(embed=embed)
-            print("Flag notification sent to channel")
-        else:
-            print("No flag channel configured!")
-        try:
-            embed = discord.Embed(
-                title="❌ Verification Failed",
-                description="❌ Sorry, it seems like you could not verify. For further questions please contact our Staff Members!",
-                color=0xFF4444
-            )
-            await member.send(embed=embed)
-            print("DM sent to user (flagged)")
-        except Exception as e:
-            print(f"Could not send DM to user: {e}")
-    else:
-        print(f"User {username} passed verification")
-        
-        # Get verified and unverified roles
-        verified_role = guild.get_role(config.get("verified_role_id"))
-        unverified_role = guild.get_role(config.get("unverified_role_id"))
-        
-        # Add verified role
-        if verified_role:
+        print(f"Checking against blacklist ({len(config.get('blacklisted_servers', {}))} own entries, feeds: {config.get('subscribed_feeds', [])})")
+        print(f"User's guild IDs: {guild_ids}")
+
+        with tracer.span(trace_id, "screening", guild_count=len(guild_ids)):
+            flagged_entries = find_flagged_entries(config, guild_ids, blacklist_feeds)
+            flagged_servers = [name for _, name in flagged_entries]
+            record_verification_outcome(guild.id, flagged_entries)
+        status = "flagged" if flagged_entries else "passed"
+
+        print(f"Blacklisted servers found: {flagged_servers}")
+
+        flag_channel = bot.get_channel(config.get("flag_channel_id")) if config.get("flag_channel_id") else None
+
+        if flagged_servers:
+            print(f"User {username} is in blacklisted servers: {flagged_servers}")
+            if flag_channel:
+                embed = discord.Embed(
+                    title="🚨 Security Alert - User Flagged",
+                    description=f"**User:** {member.mention}\n**Status:** ⚠️ Flagged during verification\n**Reason:** Member of blacklisted servers",
+                    color=0xFF4444  # Bright red
+                )
+                embed.add_field(
+                    name="🔒 Blacklisted Servers",
+                    value=f"```\n{chr(10).join(flagged_servers)}```",
+                    inline=False
+                )
+                embed.add_field(
+                    name="👤 User Info",
+                    value=f"**Username:** {username}\n**ID:** {user_id}\n**Mention:** {member.mention}",
+                    inline=True
+                )
+                embed.add_field(
+                    name="📊 Server Count",
+                    value=f"**Total Servers:** {len(guild_ids)}\n**Flagged:** {len(flagged_servers)}",
+                    inline=True
+                )
+                embed.set_footer(text="Security Verification System", icon_url=bot.user.avatar.url if bot.user.avatar else None)
+                embed.timestamp = discord.utils.utcnow()
+                with tracer.span(trace_id, "flag_notification"):
+                    await outbound.run(LANE_NOTIFY, "POST", f"/channels/{flag_channel.id}/messages", lambda: flag_channel.send(embed=embed))
+                print("Flag notification sent to channel")
+            else:
+                print("No flag channel configured!")
             try:
-                await member.add_roles(verified_role)
-                print(f"Added verified role {verified_role.name} to user")
-            except discord.Forbidden:
-                print(f"Missing permissions to add verified role {verified_role.name}")
+                embed = discord.Embed(
+                    title="❌ Verification Failed",
+                    description="❌ Sorry, it seems like you could not verify. For further questions please contact our Staff Members!",
+                    color=0xFF4444
+                )
+                with tracer.span(trace_id, "dm", outcome="flagged"):
+                    await outbound.run(LANE_NOTIFY, "POST", dm_route(member), lambda: member.send(embed=embed))
+                print("DM sent to user (flagged)")
             except Exception as e:
-                print(f"Error adding verified role: {e}")
+                print(f"Could not send DM to user: {e}")
         else:
-            print("No verified role configured!")
+            print(f"User {username} passed verification")
+        
+            # Get verified and unverified roles
+            verified_role = guild.get_role(config.get("verified_role_id"))
+            unverified_role = guild.get_role(config.get("unverified_role_id"))
+        
+            # Add verified role
+            if verified_role:
+                try:
+                    with tracer.span(trace_id, "add_role"):
+                        await outbound.run(
+                            LANE_CRITICAL, "PUT",
+                            f"/guilds/{guild.id}/members/{member.id}/roles/{verified_role.id}",
+                            lambda: member.add_roles(verified_role)
+                        )
+                    print(f"Added verified role {verified_role.name} to user")
+                except discord.Forbidden:
+                    print(f"Missing permissions to add verified role {verified_role.name}")
+                except Exception as e:
+                    print(f"Error adding verified role: {e}")
+            else:
+                print("No verified role configured!")
+        
+            # Remove unverified role if configured
+            if unverified_role and unverified_role in member.roles:
+                try:
+                    with tracer.span(trace_id, "remove_role"):
+                        await outbound.run(
+                            LANE_CRITICAL, "DELETE",
+                            f"/guilds/{guild.id}/members/{member.id}/roles/{unverified_role.id}",
+                            lambda: member.remove_roles(unverified_role)
+                        )
+                    print(f"Removed unverified role {unverified_role.name} from user")
+                except discord.Forbidden:
+                    print(f"Missing permissions to remove unverified role {unverified_role.name}")
+                except Exception as e:
+                    print(f"Error removing unverified role: {e}")
         
-        # Remove unverified role if configured
-        if unverified_role and unverified_role in member.roles:
             try:
-                await member.remove_roles(unverified_role)
-                print(f"Removed unverified role {unverified_role.name} from user")
-            except discord.Forbidden:
-                print(f"Missing permissions to remove unverified role {unverified_role.name}")
+                embed = discord.Embed(
+                    title="✅ Verification Successful!",
+                    description=f"✅ You've been verified in {guild.name}! You may continue on.",
+                    color=0x00FF00
+                )
+                with tracer.span(trace_id, "dm", outcome="passed"):
+                    await outbound.run(LANE_NOTIFY, "POST", dm_route(member), lambda: member.send(embed=embed))
+                print("DM sent to user (verified)")
             except Exception as e:
-                print(f"Error removing unverified role: {e}")
-        
-        try:
-            embed = discord.Embed(
-                title="✅ Verification Successful!",
-                description=f"✅ You've been verified in {guild.name}! You may continue on.",
-                color=0x00FF00
-            )
-            await member.send(embed=embed)
-            print("DM sent to user (verified)")
-        except Exception as e:
-            print(f"Could not send DM to user: {e}")
+                print(f"Could not send DM to user: {e}")
+    finally:
+        tracer.finish_trace(trace_id, status)
+
+# ==== Verification panel templates ====
+
+# Per-guild authorize URLs and embeds, built once and reused on every click.
+# The whole cache is dropped whenever the OAuth config or bot avatar changes.
+panel_templates = {}
+panel_templates_key = None
+panel_click_latencies = deque(maxlen=1000)
+
+def _panel_config_key():
+    avatar = bot.user.avatar.url if bot.user and bot.user.avatar else None
+    return (CLIENT_ID, REDIRECT_URI, avatar)
+
+def invalidate_panel_templates(guild_id=None):
+    """Forget cached templates for one guild, or for every guild"""
+    if guild_id is None:
+        panel_templates.clear()
+    else:
+        panel_templates.pop(str(guild_id), None)
+
+def get_panel_template(guild_id):
+    global panel_templates_key
+    key = _panel_config_key()
+    if key != panel_templates_key:
+        panel_templates.clear()
+        panel_templates_key = key
+
+    guild_str = str(guild_id)
+    template = panel_templates.get(guild_str)
+    if template is None:
+        authorize_base = f"{AUTHORIZE_URL}?" + urllib.parse.urlencode({
+            "client_id": CLIENT_ID,
+            "redirect_uri": REDIRECT_URI,
+            "response_type": "code",
+            "scope": "identify guilds",
+            "prompt": "consent"
+        })
+
+        # The panel's direct link is static, so it carries a signed state with an empty trace ID
+        panel_state = urllib.parse.quote(sign_state(guild_str, ""), safe="")
+        panel_embed = discord.Embed(
+            title="🛡️ Verification Required",
+            description=f"Click the button below to verify, or use this **[direct link]({authorize_base}&state={panel_state})**",
+            color=0xFFFFFF
+        )
+        panel_embed.set_image(url=PANEL_IMAGE_URL)
+        panel_embed.set_footer(text="🔒 Secure OAuth2 Verification", icon_url=key[2])
+
+        template = {
+            "authorize_base": authorize_base,
+            "panel_embed": panel_embed.to_dict(),
+        }
+        panel_templates[guild_str] = template
+    return template
+
+def build_verification_link(guild_id, trace_id):
+    """Per-click authorize URL: cached base plus a freshly signed state"""
+    state = urllib.parse.quote(sign_state(guild_id, trace_id), safe="")
+    return f"{get_panel_template(guild_id)['authorize_base']}&state={state}"
+
+# The link embed is identical for every guild; each click only gets its own description
+LINK_EMBED = discord.Embed(title="🔗 Verification Link", color=0xFFFFFF)
+LINK_EMBED.set_footer(text="🔒 Secure OAuth2 Verification")
+
+def verification_link_embed(url):
+    # Shallow copy shares the footer/colour with LINK_EMBED; only the description differs
+    embed = copy.copy(LINK_EMBED)
+    embed.description = f"**[🔐 Click here to complete verification]({url})**"
+    return embed
+
+def reload_oauth_config():
+    """Re-read the OAuth settings from the environment and drop every cached template"""
+    global CLIENT_ID, CLIENT_SECRET, REDIRECT_URI
+    CLIENT_ID = os.environ.get("CLIENT_ID")
+    CLIENT_SECRET = os.environ.get("CLIENT_SECRET")
+    REDIRECT_URI = os.environ.get("REDIRECT_URI", DEFAULT_REDIRECT_URI)
+    invalidate_panel_templates()
+
+async def respond_with_verification_link(interaction, guild_id):
+    """Answer a Verify click with its personal link in a single interaction response"""
+    click_start = time.perf_counter()
+    # Without STATE_SECRET the trace ID cannot ride along in the state, so the trace starts at the callback
+    trace_id = tracer.start_trace(guild_id) if STATE_SECRET else None
+    span_start = time.time()
+
+    url = build_verification_link(guild_id, trace_id)
+    await interaction.response.send_message(embed=verification_link_embed(url), ephemeral=True)
+
+    panel_click_latencies.append(time.perf_counter() - click_start)
+    tracer.record_span(trace_id, "button_click", span_start, time.time(), user_id=interaction.user.id)
+
+def panel_latency_stats():
+    latencies = sorted(panel_click_latencies)
+    if not latencies:
+        return {"samples": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+    return {
+        "samples": len(latencies),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
 
 # ---- Slash commands ----
 
@@ -369,27 +1465,8 @@ class PersistentVerificationView(discord.ui.View):
 
     @discord.ui.button(label="🔐 Verify", style=discord.ButtonStyle.grey, custom_id="verify_button")
     async def verify_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Respond immediately to avoid timeout
-        await interaction.response.defer(ephemeral=True)
-        
-        # Build OAuth2 URL with proper URL-encoding
-        params = {
-            "client_id": CLIENT_ID,
-            "redirect_uri": REDIRECT_URI,
-            "response_type": "code",
-            "scope": "identify guilds",
-            "prompt": "consent",
-            "state": str(self.guild_id)
-        }
-        url = f"https://discord.com/api/oauth2/authorize?{urllib.parse.urlencode(params)}"
-        
-        embed = discord.Embed(
-            title="🔗 Verification Link",
-            description=f"**[🔐 Click here to complete verification]({url})**",
-            color=0xFFFFFF
-        )
-        embed.set_footer(text="🔒 Secure OAuth2 Verification")
-        await interaction.followup.send(embed=embed, ephemeral=True)
+        # All guilds share the "verify_button" custom ID, so the clicked guild is the source of truth
+        await respond_with_verification_link(interaction, interaction.guild_id or self.guild_id)
 
 @bot.tree.command(name="verify-panel", description="🛡️ Set the verification panel with permanent button")
 @app_commands.check(is_admin)
@@ -397,31 +1474,17 @@ async def verify_panel(interaction: discord.Interaction):
     # Send hidden confirmation message first
     await interaction.response.send_message("Panel sent", ephemeral=True)
     
-    # Build OAuth2 URL for embed link as backup
-    params = {
-        "client_id": CLIENT_ID,
-        "redirect_uri": REDIRECT_URI,
-        "response_type": "code",
-        "scope": "identify guilds",
-        "prompt": "consent",
-        "state": str(interaction.guild.id)
-    }
-    verification_url = f"https://discord.com/api/oauth2/authorize?{urllib.parse.urlencode(params)}"
-    
-    # Create the verification panel embed with both button and direct link
-    embed = discord.Embed(
-        title="🛡️ Verification Required",
-        description=f"Click the button below to verify, or use this **[direct link]({verification_url})**",
-        color=0xFFFFFF  # Bright cyan
-    )
-    embed.set_image(url="https://cdn.discordapp.com/attachments/1330685351412498480/1403393124692398162/Screenshot_20250808-1753442.png?ex=68976332&is=689611b2&hm=575bee2a6ed0d2e351e93ebe0ac451230d671f8e4bb3dde98c20dc37ca3ee7b7&")
-    embed.set_footer(text="🔒 Secure OAuth2 Verification", icon_url=bot.user.avatar.url if bot.user.avatar else None)
+    # Panel embed comes from the per-guild template cache
+    embed = discord.Embed.from_dict(get_panel_template(interaction.guild.id)["panel_embed"])
 
     # Create persistent view
     view = PersistentVerificationView(interaction.guild.id)
     
     # Send the panel with permanent button
-    await interaction.channel.send(embed=embed, view=view)
+    await outbound.run(
+        LANE_NOTIFY, "POST", f"/channels/{interaction.channel.id}/messages",
+        lambda: interaction.channel.send(embed=embed, view=view)
+    )
 
     # Log this action
     await log_action(
@@ -489,8 +1552,18 @@ async def set_verified_role(interaction: discord.Interaction, verified_role: dis
 @app_commands.check(is_admin)
 @app_commands.describe(server_id="ID of the server to blacklist", server_name="Name of the server (for display)")
 async def bl_servers(interaction: discord.Interaction, server_id: str, server_name: str):
-    config = get_server_config(interaction.guild.id)
-    config["blacklisted_servers"][server_id] = server_name
+    own = get_server_config(interaction.guild.id).get("blacklisted_servers", {})
+    if server_id not in own and len(own) >= GUILD_BLACKLIST_MAX_ENTRIES:
+        embed = discord.Embed(
+            title="❌ Blacklist Full",
+            description=f"This server's own blacklist already has {GUILD_BLACKLIST_MAX_ENTRIES} entries. "
+                        f"Remove some with `/bl-remove` or use a shared feed.",
+            color=0xFF4444
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+
+    add_guild_blacklist_entry(interaction.guild.id, server_id, server_name)
     save_json(CONFIG_PATH, server_configs)
 
     embed = discord.Embed(
@@ -508,74 +1581,326 @@ async def bl_servers(interaction: discord.Interaction, server_id: str, server_na
         0xFF4444
     )
 
-class RemoveBLServers(discord.ui.Select):
-    def __init__(self, guild_id):
-        self.guild_id = guild_id
-        config = get_server_config(guild_id)
-        server_blacklisted = config.get("blacklisted_servers", {})
+async def blacklist_autocomplete(interaction: discord.Interaction, current: str):
+    return [
+        app_commands.Choice(name=f"{name} ({sid}){f' · {source}' if source else ''}"[:100], value=sid)
+        for sid, name, source in search_guild_blacklist(interaction.guild.id, current, limit=25)
+    ]
 
-        options = [
-            discord.SelectOption(label=name, description=f"ID: {sid}", value=sid)
-            for sid, name in server_blacklisted.items()
-        ]
-        super().__init__(placeholder="🗑️ Select a server to remove", min_values=1, max_values=1, options=options)
+@bot.tree.command(name="bl-remove", description="🗑️ Remove a blacklisted server")
+@app_commands.check(is_admin)
+@app_commands.describe(server_id="Server to remove (search by name or ID; works for feed entries too)")
+@app_commands.autocomplete(server_id=blacklist_autocomplete)
+async def bl_remove(interaction: discord.Interaction, server_id: str):
+    server_id = server_id.strip()
+    name = remove_guild_blacklist_entry(interaction.guild.id, server_id)
+    if not name:
+        embed = discord.Embed(
+            title="❌ Error",
+            description="Server not found in blacklist.",
+            color=0xFF4444
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    save_json(CONFIG_PATH, server_configs)
 
-    async def callback(self, interaction: discord.Interaction):
-        sid = self.values[0]
-        config = get_server_config(self.guild_id)
-        name = config["blacklisted_servers"].pop(sid, None)
-        save_json(CONFIG_PATH, server_configs)
+    embed = discord.Embed(
+        title="🗑️ Server Removed from Blacklist",
+        description=f"Removed blacklisted server: **{name}** (`{server_id}`)",
+        color=0x00FF00
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
 
-        if name:
-            embed = discord.Embed(
-                title="🗑️ Server Removed from Blacklist",
-                description=f"Removed blacklisted server: **{name}** (`{sid}`)",
-                color=0x00FF00
-            )
-            await interaction.response.edit_message(embed=embed, view=None)
-
-            # Log this action
-            await log_action(
-                self.guild_id,
-                "🗑️ Server Removed from Blacklist",
-                f"Admin {interaction.user.mention} removed **{name}** (`{sid}`) from the blacklist",
-                0x00FF00
+    # Log this action
+    await log_action(
+        interaction.guild.id,
+        "🗑️ Server Removed from Blacklist",
+        f"Admin {interaction.user.mention} removed **{name}** (`{server_id}`) from the blacklist",
+        0x00FF00
+    )
+
+BL_LIST_PAGE_SIZE = 15
+
+class BlacklistPageView(discord.ui.View):
+    """Cursor-paginated view of a guild's effective blacklist"""
+
+    def __init__(self, guild_id, query=None):
+        super().__init__(timeout=300)
+        self.guild_id = guild_id
+        self.query = query
+        self.cursors = [None]  # cursor that starts each visited page
+        self.next_cursor = None
+
+    def build_page(self):
+        entries, self.next_cursor = page_guild_blacklist(
+            self.guild_id, self.cursors[-1], BL_LIST_PAGE_SIZE, self.query
+        )
+        self.previous_page.disabled = len(self.cursors) == 1
+        self.next_page.disabled = self.next_cursor is None
+
+        embed = discord.Embed(
+            title="📋 Blacklisted Servers",
+            color=0x0099FF
+        )
+        if entries:
+            embed.description = "\n".join(
+                f"**{name}** (`{sid}`){f' · 🔗 {source}' if source else ''}"
+                for sid, name, source in entries
             )
         else:
-            embed = discord.Embed(
-                title="❌ Error",
-                description="Server not found in blacklist.",
-                color=0xFF4444
-            )
-            await interaction.response.edit_message(embed=embed, view=None)
+            embed.description = "No blacklisted servers match." if self.query else "No blacklisted servers."
+        footer = f"Page {len(self.cursors)}"
+        if self.query:
+            footer += f" · Search: {self.query}"
+        embed.set_footer(text=footer)
+        return embed
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.grey)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        await interaction.response.edit_message(embed=self.build_page(), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.grey)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.next_cursor is not None:
+            self.cursors.append(self.next_cursor)
+        await interaction.response.edit_message(embed=self.build_page(), view=self)
+
+@bot.tree.command(name="bl-list", description="📋 List blacklisted servers")
+@app_commands.check(is_admin)
+@app_commands.describe(search="Filter by server name or ID, or jump to a specific entry")
+@app_commands.autocomplete(search=blacklist_autocomplete)
+async def bl_list(interaction: discord.Interaction, search: str = None):
+    view = BlacklistPageView(interaction.guild.id, search)
+    await interaction.response.send_message(embed=view.build_page(), view=view, ephemeral=True)
 
-class RemoveBLView(discord.ui.View):
-    def __init__(self, guild_id):
-        super().__init__()
-        self.add_item(RemoveBLServers(guild_id))
+@bot.tree.command(name="bl-import", description="📥 Bulk import blacklisted servers from a CSV or JSON file")
+@app_commands.check(is_admin)
+@app_commands.describe(
+    file="CSV (id,name per row) or JSON ({id: name}, list of ids, or list of {id, name})",
+    feed="Import into this shared feed instead of this server's own blacklist (Bot Owner Only)"
+)
+async def bl_import(interaction: discord.Interaction, file: discord.Attachment, feed: str = None):
+    if feed and not is_bot_owner(interaction):
+        embed = discord.Embed(
+            title="❌ Permission Denied",
+            description="Only the bot owner can import into shared feeds.",
+            color=0xFF4444
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
 
-@bot.tree.command(name="bl-remove", description="🗑️ Remove a blacklisted server")
+    if file.size > BL_IMPORT_MAX_BYTES:
+        embed = discord.Embed(
+            title="❌ File Too Large",
+            description=f"Blacklist imports are limited to {BL_IMPORT_MAX_BYTES // (1024 * 1024)} MB; split the file and import it in parts.",
+            color=0xFF4444
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+
+    raw = await file.read()
+    # Parse off the event loop so large files don't stall the bot
+    try:
+        entries, invalid = await asyncio.to_thread(parse_blacklist_file, raw, file.filename)
+    except (ValueError, UnicodeError) as e:  # json.JSONDecodeError is a ValueError
+        embed = discord.Embed(
+            title="❌ Import Failed",
+            description=f"Could not parse `{file.filename}`: {e}",
+            color=0xFF4444
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        return
+
+    if feed:
+        target = blacklist_feeds.setdefault(feed, {"servers": {}})["servers"]
+    else:
+        config = get_server_config(interaction.guild.id)
+        target = config.setdefault("blacklisted_servers", {})
+
+    added = sum(1 for sid in entries if sid not in target)
+    if not feed and len(target) + added > GUILD_BLACKLIST_MAX_ENTRIES:
+        embed = discord.Embed(
+            title="❌ Blacklist Too Large",
+            description=f"This import would bring this server's own blacklist to {len(target) + added} entries; "
+                        f"the limit is {GUILD_BLACKLIST_MAX_ENTRIES}. Ask the bot owner to import it into a shared feed "
+                        f"and subscribe with `/bl-feed-subscribe`.",
+            color=0xFF4444
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        return
+    target.update(entries)
+
+    # Serialize and write from a thread; only the snapshot copy happens on the loop
+    if feed:
+        feed_blacklist_index(feed).add_many(entries)
+        await save_json_in_thread(FEEDS_PATH, snapshot_blacklist_feeds())
+        destination = f"shared feed **{feed}**"
+    else:
+        guild_blacklist_index(interaction.guild.id).add_many(entries)
+        exclusions = config.get("feed_exclusions", {})
+        for sid in entries:
+            exclusions.pop(sid, None)
+        await save_json_in_thread(CONFIG_PATH, snapshot_server_configs())
+        destination = "this server's blacklist"
+
+    embed = discord.Embed(
+        title="📥 Blacklist Import Complete",
+        description=f"Imported `{file.filename}` into {destination}",
+        color=0x00FF00 if not invalid else 0xFFAA00
+    )
+    embed.add_field(
+        name="📊 Results",
+        value=f"**Added:** {added}\n**Updated:** {len(entries) - added}\n**Invalid rows:** {invalid}\n**Total entries:** {len(target)}",
+        inline=False
+    )
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+    # Log this action
+    await log_action(
+        interaction.guild.id,
+        "📥 Blacklist Imported",
+        f"Admin {interaction.user.mention} imported {len(entries)} servers from `{file.filename}` into {destination}",
+        0xFF4444
+    )
+
+@bot.tree.command(name="bl-feed-subscribe", description="🔗 Subscribe this server to a shared blacklist feed")
 @app_commands.check(is_admin)
-async def bl_remove(interaction: discord.Interaction):
+@app_commands.describe(feed="Name of the shared feed")
+async def bl_feed_subscribe(interaction: discord.Interaction, feed: str):
+    if feed not in blacklist_feeds:
+        embed = discord.Embed(
+            title="❌ Error",
+            description=f"No shared feed named **{feed}**. Use `/bl-feeds` to see available feeds.",
+            color=0xFF4444
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+
     config = get_server_config(interaction.guild.id)
-    server_blacklisted = config.get("blacklisted_servers", {})
+    subscribed = config.setdefault("subscribed_feeds", [])
+    if feed not in subscribed:
+        subscribed.append(feed)
+        save_json(CONFIG_PATH, server_configs)
 
-    if not server_blacklisted:
+    embed = discord.Embed(
+        title="🔗 Feed Subscribed",
+        description=f"This server now uses the shared feed **{feed}** ({len(blacklist_feeds[feed]['servers'])} servers)",
+        color=0x00FF00
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # Log this action
+    await log_action(
+        interaction.guild.id,
+        "🔗 Blacklist Feed Subscribed",
+        f"Admin {interaction.user.mention} subscribed to the shared feed **{feed}**",
+        0x00FF00
+    )
+
+@bot.tree.command(name="bl-feed-unsubscribe", description="⛓️ Unsubscribe this server from a shared blacklist feed")
+@app_commands.check(is_admin)
+@app_commands.describe(feed="Name of the shared feed")
+async def bl_feed_unsubscribe(interaction: discord.Interaction, feed: str):
+    config = get_server_config(interaction.guild.id)
+    subscribed = config.setdefault("subscribed_feeds", [])
+    if feed not in subscribed:
         embed = discord.Embed(
-            title="📝 No Blacklisted Servers",
-            description="No blacklisted servers to remove.",
-            color=0xFFAA00
+            title="❌ Error",
+            description=f"This server is not subscribed to **{feed}**.",
+            color=0xFF4444
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
 
-    view = RemoveBLView(interaction.guild.id)
+    subscribed.remove(feed)
+    # Drop overrides that no remaining feed needs
+    exclusions = config.get("feed_exclusions", {})
+    for sid in list(exclusions):
+        if not any(sid in blacklist_feeds.get(f, {}).get("servers", {}) for f in subscribed):
+            exclusions.pop(sid)
+    save_json(CONFIG_PATH, server_configs)
+
+    embed = discord.Embed(
+        title="⛓️ Feed Unsubscribed",
+        description=f"This server no longer uses the shared feed **{feed}**",
+        color=0x00FF00
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # Log this action
+    await log_action(
+        interaction.guild.id,
+        "⛓️ Blacklist Feed Unsubscribed",
+        f"Admin {interaction.user.mention} unsubscribed from the shared feed **{feed}**",
+        0xFFAA00
+    )
+
+@bot.tree.command(name="bl-feeds", description="📚 Show shared blacklist feeds and this server's subscriptions")
+@app_commands.check(is_admin)
+async def bl_feeds(interaction: discord.Interaction):
+    config = get_server_config(interaction.guild.id)
+    subscribed = config.get("subscribed_feeds", [])
+
     embed = discord.Embed(
-        title="🗑️ Remove Blacklisted Server",
-        description="Select a server to remove from the blacklist:",
+        title="📚 Shared Blacklist Feeds",
         color=0x0099FF
     )
-    await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+    if blacklist_feeds:
+        lines = [
+            f"{'✅' if name in subscribed else '▫️'} **{name}** - {len(feed['servers'])} servers"
+            for name, feed in list(blacklist_feeds.items())[:25]
+        ]
+        embed.description = "\n".join(lines)
+    else:
+        embed.description = "No shared feeds exist yet."
+    embed.add_field(
+        name="🔧 This Server",
+        value=f"**Own entries:** {len(config.get('blacklisted_servers', {}))}\n**Feed overrides:** {len(config.get('feed_exclusions', {}))}",
+        inline=False
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="security-stats", description="📊 Show verification statistics for this server")
+@app_commands.check(is_admin)
+@app_commands.describe(days="How many days to include (default 7)")
+async def security_stats(interaction: discord.Interaction, days: app_commands.Range[int, 1, STATS_RETENTION_DAYS] = 7):
+    summary = summarize_guild_stats(interaction.guild.id, days)
+
+    embed = discord.Embed(
+        title="📊 Verification Statistics",
+        description=f"Last **{days}** day{'s' if days != 1 else ''}",
+        color=0x0099FF
+    )
+    total = summary["passed"] + summary["flagged"]
+    flag_rate = f"{summary['flagged'] / total:.1%}" if total else "n/a"
+    embed.add_field(
+        name="📈 Outcomes",
+        value=f"**Verified:** {summary['passed']}\n**Flagged:** {summary['flagged']}\n**Flag rate:** {flag_rate}",
+        inline=True
+    )
+    median = summary["median_guild_count"]
+    embed.add_field(
+        name="👥 Users",
+        value=f"**Stored users:** {summary['users']}\n**Median servers per user:** {median if median is not None else 'n/a'}",
+        inline=True
+    )
+    if summary["top_offenders"]:
+        embed.add_field(
+            name="🔒 Top Offending Servers",
+            value="\n".join(
+                f"**{entry['name']}** (`{entry['server_id']}`) - {entry['flags']} flags"
+                for entry in summary["top_offenders"]
+            ),
+            inline=False
+        )
+    embed.set_footer(text="Security Bot Analytics")
+    embed.timestamp = discord.utils.utcnow()
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
 
 @bot.tree.command(name="global-annc", description="📢 Send a global announcement to all servers (Bot Owner Only)")
 @app_commands.check(is_bot_owner)
@@ -616,7 +1941,10 @@ async def global_announcement(interaction: discord.Interaction, message: str):
                         break
             
             if announcement_channel:
-                await announcement_channel.send(embed=embed)
+                await outbound.run(
+                    LANE_BULK, "POST", f"/channels/{announcement_channel.id}/messages",
+                    lambda: announcement_channel.send(embed=embed)
+                )
                 success_count += 1
                 print(f"✅ Sent announcement to {guild.name} in #{announcement_channel.name}")
             else:
@@ -657,6 +1985,90 @@ async def global_announcement(interaction: discord.Interaction, message: str):
     
     await interaction.followup.send(embed=result_embed, ephemeral=True)
 
+@bot.tree.command(name="slow-traces", description="🐢 Show the slowest recent verifications (Bot Owner Only)")
+@app_commands.check(is_bot_owner)
+@app_commands.describe(count="How many traces to show (default 5)")
+async def slow_traces(interaction: discord.Interaction, count: app_commands.Range[int, 1, 10] = 5):
+    traces = tracer.slowest(count)
+
+    embed = discord.Embed(
+        title="🐢 Slowest Recent Verifications",
+        color=0x0099FF
+    )
+    if not traces:
+        embed.description = "No finished verification traces yet."
+    for trace in traces:
+        stages = {}
+        for span in trace["spans"]:
+            stages[span["name"]] = stages.get(span["name"], 0) + (span["end"] - span["start"]) * 1000
+        breakdown = "\n".join(
+            f"`{name}` {ms:.0f} ms"
+            for name, ms in sorted(stages.items(), key=lambda item: item[1], reverse=True)
+        )
+        embed.add_field(
+            name=f"{trace['duration_ms']:.0f} ms · {trace['status']} · guild {trace['guild_id']}",
+            value=f"Trace `{trace['trace_id']}`\n{breakdown or 'No spans recorded'}"[:1024],
+            inline=False
+        )
+    embed.set_footer(text=f"Last {len(tracer.recent)} traces kept in memory")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="profile", description="🔬 Capture a sampling profile of the running bot (Bot Owner Only)")
+@app_commands.check(is_bot_owner)
+@app_commands.describe(seconds="How long to sample for (default 10)")
+async def profile(interaction: discord.Interaction, seconds: app_commands.Range[int, 1, PROFILE_MAX_SECONDS] = 10):
+    await interaction.response.defer(ephemeral=True)
+
+    collapsed = await asyncio.to_thread(sample_profile, seconds)
+    if collapsed is None:
+        embed = discord.Embed(
+            title="❌ Profiler Busy",
+            description="Another profile is already running.",
+            color=0xFF4444
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        return
+
+    filename = f"profile-{discord.utils.utcnow().strftime('%Y%m%d-%H%M%S')}.collapsed"
+    embed = discord.Embed(
+        title="🔬 Profile Captured",
+        description=f"Sampled all threads for **{seconds}s**. Feed the attached file to `flamegraph.pl` or speedscope.",
+        color=0x00FF00
+    )
+    await interaction.followup.send(
+        embed=embed,
+        file=discord.File(io.BytesIO(collapsed.encode()), filename=filename),
+        ephemeral=True
+    )
+
+@bot.tree.command(name="outbound-stats", description="🚦 Show outbound request queueing per priority lane (Bot Owner Only)")
+@app_commands.check(is_bot_owner)
+async def outbound_stats(interaction: discord.Interaction):
+    embed = discord.Embed(
+        title="🚦 Outbound Request Lanes",
+        color=0x0099FF
+    )
+    for name, lane in outbound.lane_stats().items():
+        if lane["samples"]:
+            value = f"**Queued:** {lane['queued']}\n**p50:** {lane['p50_ms']} ms\n**p95:** {lane['p95_ms']} ms\n**Max:** {lane['max_ms']} ms"
+        else:
+            value = f"**Queued:** {lane['queued']}\nNo requests yet"
+        embed.add_field(name=name.capitalize(), value=value, inline=True)
+    embed.set_footer(text=f"{len(outbound.buckets)} rate-limit buckets learned")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="reload-oauth", description="🔄 Reload OAuth settings and rebuild verification links (Bot Owner Only)")
+@app_commands.check(is_bot_owner)
+async def reload_oauth(interaction: discord.Interaction):
+    reload_oauth_config()
+
+    embed = discord.Embed(
+        title="🔄 OAuth Settings Reloaded",
+        description=f"**Client ID:** `{CLIENT_ID}`\n**Redirect URI:** `{REDIRECT_URI}`\nCached panel links will be rebuilt on next use.",
+        color=0x00FF00
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 @bot.tree.command(name="help-security", description="❓ Show all security bot commands")
 async def help_security(interaction: discord.Interaction):
     embed = discord.Embed(
@@ -668,14 +2080,14 @@ async def help_security(interaction: discord.Interaction):
     if is_bot_owner(interaction):
         embed.add_field(
             name="👑 Bot Owner Commands",
-            value="• `/global-annc` - Send global announcement to all servers",
+            value="• `/global-annc` - Send global announcement to all servers\n• `/slow-traces` - Show slowest recent verifications\n• `/profile` - Capture a flamegraph-ready profile\n• `/outbound-stats` - Show outbound queueing per lane\n• `/reload-oauth` - Reload OAuth settings",
             inline=False
         )
 
     if is_admin(interaction):
         embed.add_field(
             name="🔧 Admin Commands",
-            value="• `/verify-panel` - Create verification panel\n• `/flag-channel` - Set flagged users channel\n• `/set-verified-role` - Set verified & unverified roles\n• `/bl-servers` - Add blacklisted server\n• `/bl-remove` - Remove blacklisted server\n• `/help-security` - Show this help",
+            value="• `/verify-panel` - Create verification panel\n• `/flag-channel` - Set flagged users channel\n• `/set-verified-role` - Set verified & unverified roles\n• `/bl-servers` - Add blacklisted server\n• `/bl-remove` - Remove blacklisted server\n• `/bl-list` - Browse and search the blacklist\n• `/bl-import` - Bulk import blacklist from CSV/JSON\n• `/bl-feeds` - Show shared blacklist feeds\n• `/bl-feed-subscribe` / `/bl-feed-unsubscribe` - Manage feed subscriptions\n• `/security-stats` - Show verification statistics\n• `/help-security` - Show this help",
             inline=False
         )
     else:
@@ -715,7 +2127,12 @@ async def on_app_command_error(interaction: discord.Interaction, error):
 
 # ==== FastAPI webserver ====
 
-app = FastAPI()
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    loop_monitor.attach("uvicorn")
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -724,7 +2141,10 @@ async def log_requests(request: Request, call_next):
     print(f"URL: {request.url}")
     print(f"Path: {request.url.path}")
     print(f"Query params: {dict(request.query_params)}")
-    print(f"Headers: {dict(request.headers)}")
+    headers = dict(request.headers)
+    if "authorization" in headers:
+        headers["authorization"] = "<redacted>"
+    print(f"Headers: {headers}")
     response = await call_next(request)
     print(f"Response status: {response.status_code}")
     return response
@@ -733,18 +2153,78 @@ async def log_requests(request: Request, call_next):
 async def root():
     return HTMLResponse("<h2>🛡️ OAuth2 Verification Server</h2><p>Click Verify in Discord to start.</p>")
 
+def is_admin_request(request: Request) -> bool:
+    """Admin HTTP routes require ADMIN_API_TOKEN; with no token configured they stay closed"""
+    if not ADMIN_API_TOKEN:
+        return False
+    supplied = request.headers.get("authorization", "")
+    return hmac.compare_digest(supplied.encode(), f"Bearer {ADMIN_API_TOKEN}".encode())
+
+@app.get("/stats/{guild_id}")
+async def stats_endpoint(request: Request, guild_id: int, days: int = 7, top: int = 5):
+    if not is_admin_request(request):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    days = max(1, min(days, STATS_RETENTION_DAYS))
+    top = max(1, min(top, 25))
+    return JSONResponse(summarize_guild_stats(guild_id, days, top))
+
+async def profile_endpoint(request: Request, seconds: int = 10):
+    if not is_admin_request(request):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    seconds = max(1, min(seconds, PROFILE_MAX_SECONDS))
+    collapsed = await asyncio.to_thread(sample_profile, seconds)
+    if collapsed is None:
+        return JSONResponse({"error": "profile already running"}, status_code=409)
+    return PlainTextResponse(
+        collapsed,
+        headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'}
+    )
+
+# Profiling spends CPU under the GIL and exposes internal stacks, so the
+# route only exists when an admin token is configured
+if ADMIN_API_TOKEN:
+    app.get("/admin/profile")(profile_endpoint)
+
+@app.get("/admin/outbound")
+async def outbound_endpoint(request: Request):
+    if not is_admin_request(request):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    return JSONResponse(outbound.lane_stats())
+
+@app.get("/admin/panel")
+async def panel_endpoint(request: Request):
+    if not is_admin_request(request):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    return JSONResponse(panel_latency_stats())
+
 @app.get("/oauth/callback")
 async def oauth_callback(code: str = None, error: str = None, state: str = None):
     print("=== OAuth callback triggered ===")
     print(f"Code received: {code is not None}")
     print(f"Error received: {error}")
-    print(f"State (guild_id): {state}")
+    print(f"State: {state}")
+    callback_start = time.time()
+
+    target_guild_id = None
+    trace_id = None
+    if state:
+        try:
+            target_guild_id, trace_id = parse_state(state)
+        except ValueError:
+            print("Rejected OAuth state with bad signature")
+            return HTMLResponse("<h3>❌ Invalid verification link. Please click Verify again.</h3>")
+        trace_id = tracer.ensure_trace(target_guild_id, trace_id)
+        redirect_start = tracer.last_span_end(trace_id)
+        if redirect_start and redirect_start < callback_start:
+            tracer.record_span(trace_id, "browser_redirect", redirect_start, callback_start)
 
     if error:
         print(f"OAuth error occurred: {error}")
+        tracer.finish_trace(trace_id, "oauth_error")
         return HTMLResponse(f"<h3>❌ OAuth error: {error}</h3>")
     if not code:
         print("No authorization code provided")
+        tracer.finish_trace(trace_id, "no_code")
         return HTMLResponse("<h3>❌ No code provided.</h3>")
 
     token_url = "https://discord.com/api/oauth2/token"
@@ -759,25 +2239,31 @@ async def oauth_callback(code: str = None, error: str = None, state: str = None)
     }
 
     async with httpx.AsyncClient() as client:
-        token_resp = await client.post(token_url, data=data, headers=headers)
+        with tracer.span(trace_id, "token_exchange"):
+            token_resp = await client.post(token_url, data=data, headers=headers)
         if token_resp.status_code != 200:
+            tracer.finish_trace(trace_id, "token_error")
             return HTMLResponse(f"<h3>❌ Failed to get token: {token_resp.text}</h3>")
         token_json = token_resp.json()
         access_token = token_json.get("access_token")
 
-        user_resp = await client.get(
-            "https://discord.com/api/users/@me",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
+        with tracer.span(trace_id, "fetch_user"):
+            user_resp = await client.get(
+                "https://discord.com/api/users/@me",
+                headers={"Authorization": f"Bearer {access_token}"}
+            )
         if user_resp.status_code != 200:
+            tracer.finish_trace(trace_id, "user_error")
             return HTMLResponse(f"<h3>❌ Failed to get user info: {user_resp.text}</h3>")
         user_json = user_resp.json()
 
-        guilds_resp = await client.get(
-            "https://discord.com/api/users/@me/guilds",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
+        with tracer.span(trace_id, "fetch_guilds"):
+            guilds_resp = await client.get(
+                "https://discord.com/api/users/@me/guilds",
+                headers={"Authorization": f"Bearer {access_token}"}
+            )
         if guilds_resp.status_code != 200:
+            tracer.finish_trace(trace_id, "guilds_error")
             return HTMLResponse(f"<h3>❌ Failed to get guilds: {guilds_resp.text}</h3>")
         guilds_json = guilds_resp.json()
 
@@ -785,7 +2271,6 @@ async def oauth_callback(code: str = None, error: str = None, state: str = None)
     username = user_json["username"]
     discriminator = user_json["discriminator"]
     user_guild_ids = [str(g["id"]) for g in guilds_json]
-    target_guild_id = int(state) if state else None
 
     # Put data into bot's verification queue
     verification_data = {
@@ -793,7 +2278,9 @@ async def oauth_callback(code: str = None, error: str = None, state: str = None)
         "username": username,
         "discriminator": discriminator,
         "guild_ids": user_guild_ids,
-        "target_guild_id": target_guild_id
+        "target_guild_id": target_guild_id,
+        "trace_id": trace_id,
+        "enqueued_at": time.time()
     }
     print(f"Adding user {username} ({user_id}) to verification queue for guild {target_guild_id}")
     print(f"User guild IDs: {user_guild_ids}")